@@ -172,7 +172,9 @@ async def aggregate_encrypted_metrics(
         )
 
     try:
-        context = HEService.create_context()
+        # Sum and average need only ciphertext addition and plaintext scaling,
+        # so skip the expensive rotation and relinearization keygen
+        context = HEService.create_context(generate_galois_keys=False, generate_relin_keys=False)
         encrypted_values = [base64.b64encode(m.encrypted_value).decode('utf-8') for m in metrics]
 
         if request.operation == "sum":
@@ -19,6 +19,9 @@ from ..schemas.encrypted_data import (
     EncryptedBackupData,
     EncryptedBackupResponse,
     EncryptedBackupList,
+    EncryptedBackupBatch,
+    EncryptedBackupBatchResponse,
+    BatchConflict,
     ConflictList,
     SyncConflict as SyncConflictSchema,
     ConflictVersion,
@@ -117,6 +120,75 @@ async def upload_encrypted_backup(
         )
 
 
+@router.post("/backups/bulk", response_model=EncryptedBackupBatchResponse, status_code=status.HTTP_201_CREATED)
+async def upload_encrypted_backups_bulk(
+    batch: EncryptedBackupBatch,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload many encrypted backups in one request and one transaction.
+
+    Unlike POST /backup, conflicts do not fail the request: conflicting
+    backups are recorded and listed in the response, and the rest are stored.
+
+    Privacy tier requirements:
+    - local_only: REJECTED (403)
+    - analytics_sync: REJECTED (403)
+    - full_sync: ALLOWED
+
+    Args:
+        batch: Encrypted backups (content + metadata)
+        current_user: Authenticated user
+        db: Database session
+
+    Returns:
+        EncryptedBackupBatchResponse: Stored backups and detected conflicts
+
+    Raises:
+        403: User's privacy tier does not allow full sync
+    """
+    if current_user.privacy_tier != 'full_sync':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Full sync not enabled. Upgrade privacy tier to 'full_sync' to upload backups."
+        )
+
+    try:
+        backups_data = [backup_data.model_dump() for backup_data in batch.backups]
+
+        stored, conflicts = SyncService.store_encrypted_backups_batch(
+            db=db,
+            user_id=current_user.id,
+            backups_data=backups_data
+        )
+
+        return EncryptedBackupBatchResponse(
+            stored=[
+                EncryptedBackupResponse(
+                    id=backup.id,
+                    user_id=str(backup.user_id),
+                    created_at=backup.created_at,
+                    updated_at=backup.updated_at,
+                    device_id=backup.device_id
+                )
+                for backup in stored
+            ],
+            conflicts=[
+                BatchConflict(conflict_id=str(conflict.id), log_id=conflict.log_id)
+                for conflict in conflicts
+            ],
+            message=f"Stored {len(stored)} backups, {len(conflicts)} conflicts detected"
+        )
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to store encrypted backups: {str(e)}"
+        )
+
+
 @router.get("/backups", response_model=EncryptedBackupList, status_code=status.HTTP_200_OK)
 async def fetch_encrypted_backups(
     since: Optional[datetime] = Query(None, description="Fetch backups updated after this timestamp"),
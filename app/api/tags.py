@@ -110,14 +110,11 @@ async def cleanup_stale_tags(
     """
     cutoff_date = datetime.utcnow() - timedelta(days=days)
 
-    stale_tags = db.query(Tag).filter(
+    # Single DELETE statement instead of loading and deleting tags one by one
+    deleted_count = db.query(Tag).filter(
         Tag.user_id == current_user.id,
         Tag.last_used_at < cutoff_date
-    ).all()
-
-    deleted_count = len(stale_tags)
-    for tag in stale_tags:
-        db.delete(tag)
+    ).delete(synchronize_session=False)
 
     db.commit()
 
@@ -30,6 +30,9 @@ from .encrypted_data import (
     EncryptedBackupData,
     EncryptedBackupResponse,
     EncryptedBackupList,
+    EncryptedBackupBatch,
+    BatchConflict,
+    EncryptedBackupBatchResponse,
     ConflictVersion,
     SyncConflict,
     ConflictResolution,
@@ -91,6 +94,9 @@ __all__ = [
     'EncryptedBackupData',
     'EncryptedBackupResponse',
     'EncryptedBackupList',
+    'EncryptedBackupBatch',
+    'BatchConflict',
+    'EncryptedBackupBatchResponse',
     'ConflictVersion',
     'SyncConflict',
     'ConflictResolution',
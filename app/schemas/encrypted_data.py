@@ -177,6 +177,24 @@ class EncryptedBackupList(BaseModel):
     total_count: Optional[int] = Field(None, description="Total number of backups (optional)")
 
 
+class EncryptedBackupBatch(BaseModel):
+    """Batch of encrypted backups from client"""
+    backups: list[EncryptedBackupData] = Field(..., min_length=1, max_length=500, description="Encrypted backups to store (max 500)")
+
+
+class BatchConflict(BaseModel):
+    """Conflict detected while storing a batch of backups"""
+    conflict_id: str
+    log_id: str
+
+
+class EncryptedBackupBatchResponse(BaseModel):
+    """Response from batch backup upload"""
+    stored: list[EncryptedBackupResponse]
+    conflicts: list[BatchConflict] = Field(default_factory=list, description="Backups that conflicted (fetch conflicts to resolve)")
+    message: str
+
+
 class ConflictVersion(BaseModel):
     """One version of a conflicting entry"""
     encrypted_content: str
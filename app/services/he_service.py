@@ -183,6 +183,28 @@ class HEService:
         he_operation_duration.labels(operation='aggregate_sum').observe(duration)
         return base64.b64encode(serialized).decode('utf-8')
 
+    @classmethod
+    def aggregate_sum_slots(cls, encrypted_b64: str, context: ts.Context) -> str:
+        """
+        Sum all slots of a packed encrypted vector (rotate-and-add reduction)
+
+        One ciphertext from encrypt_metrics_batch replaces a list of
+        single-value ciphertexts. Requires a context with Galois keys.
+
+        Args:
+            encrypted_b64: Base64-encoded encrypted vector
+            context: TenSEAL context with Galois keys
+
+        Returns:
+            Base64-encoded encrypted sum (single value)
+        """
+        start_time = time.time()
+        result = cls.deserialize_encrypted(encrypted_b64, context).sum()
+        serialized = result.serialize()
+        duration = time.time() - start_time
+        he_operation_duration.labels(operation='aggregate_sum_slots').observe(duration)
+        return base64.b64encode(serialized).decode('utf-8')
+
     @classmethod
     def aggregate_average(cls, encrypted_values: List[str], context: ts.Context) -> str:
         """
@@ -292,3 +314,35 @@ def decrypt_user_metrics(encrypted_metrics: Dict[str, str], context: ts.Context)
     for metric_type, encrypted_value in encrypted_metrics.items():
         decrypted_metrics[metric_type] = HEService.decrypt_result(encrypted_value, context)
     return decrypted_metrics
+
+
+def encrypt_user_metrics_packed(metrics: Dict[str, float], context: ts.Context) -> tuple[List[str], str]:
+    """
+    Encrypt multiple user metrics into a single packed CKKS vector
+
+    Args:
+        metrics: Dictionary of metric_type -> value
+        context: TenSEAL context
+
+    Returns:
+        Tuple of (metric_types in slot order, encrypted_vector (base64))
+    """
+    metric_types = list(metrics.keys())
+    encrypted = HEService.encrypt_metrics_batch(list(metrics.values()), context)
+    return metric_types, encrypted
+
+
+def decrypt_user_metrics_packed(metric_types: List[str], encrypted: str, context: ts.Context) -> Dict[str, float]:
+    """
+    Decrypt a packed CKKS vector of user metrics
+
+    Args:
+        metric_types: Metric types in slot order
+        encrypted: Encrypted vector from encrypt_user_metrics_packed
+        context: TenSEAL context with secret key
+
+    Returns:
+        Dictionary of metric_type -> decrypted_value
+    """
+    values = HEService.decrypt_batch(encrypted, context)
+    return dict(zip(metric_types, values))
@@ -8,7 +8,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from typing import List, Optional, Tuple, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, raiseload
 import base64
 import uuid
 
@@ -58,38 +58,123 @@ class SyncService:
                 )
                 return None, conflict_record
             else:
-                existing.encrypted_content = base64.b64decode(backup_data['encrypted_content'])
-                existing.content_iv = backup_data['content_iv']
-                existing.content_tag = backup_data.get('content_tag')
-                existing.updated_at = backup_data['updated_at']
-                existing.device_id = backup_data['device_id']
-
-                if backup_data.get('encrypted_embedding'):
-                    existing.encrypted_embedding = base64.b64decode(backup_data['encrypted_embedding'])
-                    existing.embedding_iv = backup_data.get('embedding_iv')
+                SyncService._apply_backup_update(existing, backup_data)
 
                 db.commit()
                 db.refresh(existing)
                 return existing, None
         else:
-            new_backup = EncryptedBackup(
-                id=backup_data['id'],
-                user_id=user_id,
-                encrypted_content=base64.b64decode(backup_data['encrypted_content']),
-                content_iv=backup_data['content_iv'],
-                content_tag=backup_data.get('content_tag'),
-                encrypted_embedding=base64.b64decode(backup_data['encrypted_embedding']) if backup_data.get('encrypted_embedding') else None,
-                embedding_iv=backup_data.get('embedding_iv'),
-                created_at=backup_data['created_at'],
-                updated_at=backup_data['updated_at'],
-                device_id=backup_data['device_id']
-            )
+            new_backup = SyncService._build_backup(user_id, backup_data)
 
             db.add(new_backup)
             db.commit()
             db.refresh(new_backup)
             return new_backup, None
 
+    @staticmethod
+    def store_encrypted_backups_batch(
+        db: Session,
+        user_id: uuid.UUID,
+        backups_data: List[Dict[str, Any]]
+    ) -> tuple[list[EncryptedBackup], list[SyncConflict]]:
+        """
+        Store many encrypted backups in a single transaction.
+
+        Existing backups are looked up with one query and everything is
+        committed once, instead of a query + commit per backup.
+
+        Args:
+            db: Database session
+            user_id: User UUID
+            backups_data: List of dicts with id, encrypted_content, content_iv, device_id, etc.
+
+        Returns:
+            Tuple of (stored backups, conflict records)
+        """
+        backup_ids = [backup_data['id'] for backup_data in backups_data]
+        existing_by_id = {
+            backup.id: backup
+            for backup in db.query(EncryptedBackup).filter(
+                EncryptedBackup.id.in_(backup_ids),
+                EncryptedBackup.user_id == user_id
+            ).all()
+        }
+
+        stored: list[EncryptedBackup] = []
+        conflicts: list[SyncConflict] = []
+
+        for backup_data in backups_data:
+            existing = existing_by_id.get(backup_data['id'])
+
+            if existing is None:
+                new_backup = SyncService._build_backup(user_id, backup_data)
+                db.add(new_backup)
+                existing_by_id[new_backup.id] = new_backup
+                stored.append(new_backup)
+            elif SyncService.detect_conflict(local_backup=backup_data, remote_backup=existing):
+                conflict_record = SyncService._build_conflict_record(
+                    user_id=user_id,
+                    log_id=backup_data['id'],
+                    local_data=backup_data,
+                    remote_data=existing
+                )
+                db.add(conflict_record)
+                conflicts.append(conflict_record)
+            else:
+                SyncService._apply_backup_update(existing, backup_data)
+                if existing not in stored:
+                    stored.append(existing)
+
+        # Ids are assigned when the rows are built; read them before commit
+        # expires the rows (reading them afterwards is a SELECT per row)
+        stored_ids = [backup.id for backup in stored]
+        conflict_ids = [conflict.id for conflict in conflicts]
+        db.commit()
+
+        # Reload the expired rows with one query per table rather than one
+        # refresh each
+        if stored_ids:
+            db.query(EncryptedBackup).filter(
+                EncryptedBackup.id.in_(stored_ids),
+                EncryptedBackup.user_id == user_id
+            ).all()
+        if conflict_ids:
+            db.query(SyncConflict).filter(
+                SyncConflict.id.in_(conflict_ids),
+                SyncConflict.user_id == user_id
+            ).all()
+
+        return stored, conflicts
+
+    @staticmethod
+    def _build_backup(user_id: uuid.UUID, backup_data: Dict[str, Any]) -> EncryptedBackup:
+        """Build a new EncryptedBackup from client backup data"""
+        return EncryptedBackup(
+            id=backup_data['id'],
+            user_id=user_id,
+            encrypted_content=base64.b64decode(backup_data['encrypted_content']),
+            content_iv=backup_data['content_iv'],
+            content_tag=backup_data.get('content_tag'),
+            encrypted_embedding=base64.b64decode(backup_data['encrypted_embedding']) if backup_data.get('encrypted_embedding') else None,
+            embedding_iv=backup_data.get('embedding_iv'),
+            created_at=backup_data['created_at'],
+            updated_at=backup_data['updated_at'],
+            device_id=backup_data['device_id']
+        )
+
+    @staticmethod
+    def _apply_backup_update(existing: EncryptedBackup, backup_data: Dict[str, Any]) -> None:
+        """Overwrite an existing backup with newer client data"""
+        existing.encrypted_content = base64.b64decode(backup_data['encrypted_content'])
+        existing.content_iv = backup_data['content_iv']
+        existing.content_tag = backup_data.get('content_tag')
+        existing.updated_at = backup_data['updated_at']
+        existing.device_id = backup_data['device_id']
+
+        if backup_data.get('encrypted_embedding'):
+            existing.encrypted_embedding = base64.b64decode(backup_data['encrypted_embedding'])
+            existing.embedding_iv = backup_data.get('embedding_iv')
+
     @staticmethod
     def detect_conflict(local_backup: Dict[str, Any], remote_backup: EncryptedBackup) -> bool:
         """
@@ -137,7 +222,28 @@ class SyncService:
         Returns:
             Created SyncConflict record
         """
-        conflict = SyncConflict(
+        conflict = SyncService._build_conflict_record(
+            user_id=user_id,
+            log_id=log_id,
+            local_data=local_data,
+            remote_data=remote_data
+        )
+
+        db.add(conflict)
+        db.commit()
+        db.refresh(conflict)
+        return conflict
+
+    @staticmethod
+    def _build_conflict_record(
+        user_id: uuid.UUID,
+        log_id: str,
+        local_data: Dict[str, Any],
+        remote_data: EncryptedBackup
+    ) -> SyncConflict:
+        """Build an unsaved SyncConflict from the local and remote versions"""
+        return SyncConflict(
+            id=uuid.uuid4(),
             user_id=user_id,
             log_id=log_id,
             local_encrypted_content=base64.b64decode(local_data['encrypted_content']),
@@ -153,11 +259,6 @@ class SyncService:
             detected_at=datetime.utcnow()
         )
 
-        db.add(conflict)
-        db.commit()
-        db.refresh(conflict)
-        return conflict
-
     @staticmethod
     def fetch_backups_since(
         db: Session,
@@ -179,7 +280,8 @@ class SyncService:
         Returns:
             List of EncryptedBackup records
         """
-        query = db.query(EncryptedBackup).filter(
+        # Sync responses only read columns; fail loudly on any lazy load (N+1)
+        query = db.query(EncryptedBackup).options(raiseload('*')).filter(
             EncryptedBackup.user_id == user_id
         )
 
@@ -257,7 +359,7 @@ class SyncService:
         Returns:
             List of unresolved SyncConflict records
         """
-        return db.query(SyncConflict).filter(
+        return db.query(SyncConflict).options(raiseload('*')).filter(
             SyncConflict.user_id == user_id,
             SyncConflict.resolved == False
         ).order_by(SyncConflict.detected_at.desc()).all()
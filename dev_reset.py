@@ -21,19 +21,16 @@ Test User Credentials:
 
 import sys
 import os
-from pathlib import Path
-
-# Add project root to path
-project_root = Path(__file__).parent
-sys.path.insert(0, str(project_root))
-
 import argparse
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 from app.database import SessionLocal, engine
-from app.services.auth_service import create_user, get_user_by_email
+from app.services.auth_service import get_password_hash, get_user_by_email
 from app.schemas.user import UserCreate
-from app.models.models import Base
+from app.models.models import Base, User
 
 # Import reset functions
 from tests.db.reset_dbs import reset_databases
@@ -87,6 +84,26 @@ def confirm_reset() -> bool:
     response = input(f"{Colors.BOLD}Are you sure you want to continue? (yes/no): {Colors.ENDC}").strip().lower()
     return response in ['yes', 'y']
 
+def build_test_user(email: str, password: str, display_name: str, hashed_password: Optional[str] = None) -> User:
+    """Build an unsaved test user (validated through UserCreate)
+
+    Pass hashed_password when the password has already been hashed.
+    """
+    user_create = UserCreate(
+        email=email,
+        password=password,
+        display_name=display_name,
+        timezone="UTC",
+        locale="en-US",
+        daily_word_goal=750
+    )
+
+    return User(
+        id=uuid.uuid4(),
+        hashed_password=hashed_password or get_password_hash(user_create.password),
+        **user_create.model_dump(exclude={"password"})
+    )
+
 def create_test_user(db: Session, email: str, password: str, display_name: str) -> bool:
     """Create a single test user"""
     try:
@@ -96,17 +113,8 @@ def create_test_user(db: Session, email: str, password: str, display_name: str)
             print_warning(f"User {email} already exists, skipping...")
             return False
 
-        # Create user
-        user_create = UserCreate(
-            email=email,
-            password=password,
-            display_name=display_name,
-            timezone="UTC",
-            locale="en-US",
-            daily_word_goal=750
-        )
-
-        user = create_user(db, user_create)
+        user = build_test_user(email, password, display_name)
+        db.add(user)
         print_success(f"Created user: {email} (ID: {user.id})")
         return True
 
@@ -115,7 +123,11 @@ def create_test_user(db: Session, email: str, password: str, display_name: str)
         return False
 
 def seed_basic_users(db: Session) -> int:
-    """Create basic test users"""
+    """Create basic test users
+
+    Users are added to the session and inserted together with a single
+    flush; the caller commits once.
+    """
     print_header("Creating Test Users")
 
     users = [
@@ -141,12 +153,36 @@ def seed_basic_users(db: Session) -> int:
         }
     ]
 
-    created = 0
+    # Look up every seed email in one query instead of one query per user
+    existing_emails = {
+        email for (email,) in db.query(User.email).filter(
+            User.email.in_([user_data["email"] for user_data in users])
+        )
+    }
+
+    pending = []
     for user_data in users:
-        if create_test_user(db, **user_data):
-            created += 1
+        if user_data["email"] in existing_emails:
+            print_warning(f"User {user_data['email']} already exists, skipping...")
+            continue
+        pending.append(user_data)
+
+    # bcrypt dominates seeding time and releases the GIL, so hash concurrently
+    with ThreadPoolExecutor() as executor:
+        hashes = list(executor.map(get_password_hash, [user_data["password"] for user_data in pending]))
+
+    new_users = [
+        build_test_user(**user_data, hashed_password=hashed_password)
+        for user_data, hashed_password in zip(pending, hashes)
+    ]
+
+    db.add_all(new_users)
+    db.flush()
+
+    for user in new_users:
+        print_success(f"Created user: {user.email} (ID: {user.id})")
 
-    return created
+    return len(new_users)
 
 def print_credentials():
     """Print test user credentials for easy reference"""
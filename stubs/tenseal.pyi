@@ -21,6 +21,7 @@ class CKKSVector:
     def decrypt(self) -> List[float]: ...
     def __add__(self, other: CKKSVector) -> CKKSVector: ...
     def __mul__(self, scalar: float) -> CKKSVector: ...
+    def sum(self) -> CKKSVector: ...
 
 def context(
     scheme: int,
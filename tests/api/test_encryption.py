@@ -185,7 +185,7 @@ class TestAggregateMetrics:
         db_user.privacy_tier = 'full_sync'
         db.commit()
 
-        context = HEService.create_context()
+        context = HEService.create_context(generate_galois_keys=False)
 
         for i in range(5):
             encrypted_value = HEService.encrypt_metric(float(i + 1), context)
@@ -129,6 +129,75 @@ class TestUploadBackup:
         assert data["log_id"] == log_id
 
 
+class TestBulkUploadBackups:
+    """Tests for POST /api/sync/backups/bulk endpoint"""
+
+    def test_bulk_upload_stores_all_backups(self, client, test_user, db):
+        """Test uploading several backups in one request"""
+        db_user = db.query(User).filter(User.id == test_user["user"].id).first()
+        db_user.privacy_tier = 'full_sync'
+        db.commit()
+
+        backups = [create_test_backup() for _ in range(3)]
+
+        response = client.post(
+            "/api/sync/backups/bulk",
+            headers=test_user["headers"],
+            json={"backups": backups}
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert [b["id"] for b in data["stored"]] == [b["id"] for b in backups]
+        assert data["conflicts"] == []
+
+        fetched = client.get("/api/sync/backups", headers=test_user["headers"]).json()
+        assert len(fetched["backups"]) == 3
+
+    def test_bulk_upload_reports_conflicts(self, client, test_user, db):
+        """Test that conflicting backups are reported without failing the batch"""
+        db_user = db.query(User).filter(User.id == test_user["user"].id).first()
+        db_user.privacy_tier = 'full_sync'
+        db.commit()
+
+        log_id = str(uuid.uuid4())
+        client.post(
+            "/api/sync/backup",
+            headers=test_user["headers"],
+            json=create_test_backup(log_id=log_id, device_id="device-1")
+        )
+
+        conflicting = create_test_backup(log_id=log_id, device_id="device-2")
+        conflicting["updated_at"] = (datetime.utcnow() + timedelta(seconds=5)).isoformat() + "Z"
+        fresh = create_test_backup(device_id="device-2")
+
+        response = client.post(
+            "/api/sync/backups/bulk",
+            headers=test_user["headers"],
+            json={"backups": [conflicting, fresh]}
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert [b["id"] for b in data["stored"]] == [fresh["id"]]
+        assert len(data["conflicts"]) == 1
+        assert data["conflicts"][0]["log_id"] == log_id
+
+    def test_bulk_upload_privacy_tier_validation_403(self, client, test_user, db):
+        """Test that non-full_sync users get 403"""
+        db_user = db.query(User).filter(User.id == test_user["user"].id).first()
+        db_user.privacy_tier = 'analytics_sync'
+        db.commit()
+
+        response = client.post(
+            "/api/sync/backups/bulk",
+            headers=test_user["headers"],
+            json={"backups": [create_test_backup()]}
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
 class TestFetchBackups:
     """Tests for GET /api/sync/backups endpoint"""
 
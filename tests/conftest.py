@@ -1,20 +1,18 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 import os
 from typing import Generator, Dict
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from faker import Faker
 import warnings
 
-from app.main import app
-from app.database import get_db, Base
-from app.models.models import User
-from app.services.auth_service import create_access_token, get_password_hash
-
 # Get database URL from environment
-DATABASE_URL = os.environ.get("DATABASE_URL")
+DATABASE_URL: str = os.environ.get("DATABASE_URL", "")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
@@ -28,6 +26,59 @@ if "reflective" in DATABASE_URL and "test" not in DATABASE_URL:
         RuntimeWarning
     )
 
+
+def _admin_engine(url):
+    """AUTOCOMMIT engine on the maintenance database, for CREATE/DROP DATABASE"""
+    return create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+
+
+def create_template_database(database_url: str) -> None:
+    """Build the schema once in <db>_template for xdist workers to clone"""
+    url = make_url(database_url)
+    template_url = url.set(database=f"{url.database}_template")
+
+    admin_engine = _admin_engine(url)
+    with admin_engine.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{template_url.database}"'))
+        conn.execute(text(f'CREATE DATABASE "{template_url.database}"'))
+    admin_engine.dispose()
+
+    # No connection may stay open on a template while it is being cloned
+    template_engine = create_engine(template_url, poolclass=NullPool)
+    Base.metadata.create_all(bind=template_engine)
+    template_engine.dispose()
+
+
+def create_worker_database(database_url: str, worker_id: str) -> str:
+    """Clone <db>_template into a fresh per-worker database and return its URL"""
+    url = make_url(database_url)
+    worker_url = url.set(database=f"{url.database}_{worker_id}")
+
+    # CREATE DATABASE ... TEMPLATE is a file copy, cheaper than replaying the DDL
+    admin_engine = _admin_engine(url)
+    with admin_engine.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{worker_url.database}"'))
+        conn.execute(text(
+            f'CREATE DATABASE "{worker_url.database}" TEMPLATE "{url.database}_template"'
+        ))
+    admin_engine.dispose()
+
+    return worker_url.render_as_string(hide_password=False)
+
+
+# Under pytest-xdist each worker (gw0, gw1, ...) gets its own database so
+# schema resets and commits never collide. The app reads DATABASE_URL at
+# import time, so this has to happen before importing it.
+XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+if XDIST_WORKER:
+    DATABASE_URL = create_worker_database(DATABASE_URL, XDIST_WORKER)
+    os.environ["DATABASE_URL"] = DATABASE_URL
+
+from app.main import app
+from app.database import get_db, Base
+from app.models.models import User
+from app.services.auth_service import create_access_token, get_password_hash
+
 # Setup test database
 engine = create_engine(DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -37,6 +88,47 @@ os.environ["SECRET_KEY"] = "test_secret_key_for_testing_only"
 
 fake = Faker()
 
+# Seeded users' tokens are signed once per session, so they must outlive it
+# (the app default is 15 minutes)
+TEST_TOKEN_EXPIRES = timedelta(hours=1)
+
+# Optional pyinstrument profiling of the whole test session (PROFILE=1)
+_profiler = None
+
+
+def pytest_configure(config):
+    """In the xdist controller, build the template database workers clone"""
+    numprocesses = getattr(config.option, "numprocesses", None)
+    if os.environ.get("PROFILE") == "1" and numprocesses:
+        # The controller and every worker would each overwrite prof.html
+        raise pytest.UsageError("PROFILE=1 profiles a single process; run it with -n 0")
+    if XDIST_WORKER or not numprocesses:
+        return
+    create_template_database(DATABASE_URL)
+
+
+def pytest_sessionstart(session):
+    """Start profiling the test session when PROFILE=1 is set"""
+    global _profiler
+    if os.environ.get("PROFILE") != "1":
+        return
+
+    from pyinstrument import Profiler  # pyright: ignore[reportMissingImports]
+
+    _profiler = Profiler(async_mode="disabled")
+    _profiler.start()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Stop profiling and write the HTML report to prof.html"""
+    if _profiler is None:
+        return
+
+    _profiler.stop()
+    with open("prof.html", "w") as f:
+        f.write(_profiler.output_html())
+    print("\nProfile written to prof.html")
+
 def override_get_db():
     """Override the get_db dependency for testing"""
     connection = engine.connect()
@@ -63,10 +155,21 @@ def reset_postgres_db():
 def setup_test_database():
     """Reset PostgreSQL before running tests"""
     print("\nSetting up test environment...")
-    reset_postgres_db()
+    # Worker databases are fresh clones of the template, already at the schema
+    if not XDIST_WORKER:
+        reset_postgres_db()
     yield
     print("\nTest data preserved in database")
 
+@pytest.fixture(scope="session")
+def seed_db(setup_test_database) -> Generator:
+    """Session for seeding rows shared by many tests (commits persist for the run)"""
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
 @pytest.fixture(autouse=True)
 def cleanup_after_test(db):
     """Clean up database after each test"""
@@ -83,8 +186,10 @@ def db() -> Generator:
     # Begin a non-ORM transaction
     transaction = connection.begin()
     
-    # Configure the session with the connection
-    session = TestingSessionLocal(bind=connection)
+    # Configure the session with the connection; commit()/rollback() inside
+    # the test (including in app code) only release or roll back a SAVEPOINT,
+    # so the outer transaction still discards everything at teardown
+    session = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
     
     try:
         yield session
@@ -95,7 +200,34 @@ def db() -> Generator:
         connection.close()
 
 @pytest.fixture
-def client(db) -> Generator[TestClient, None, None]:
+def count_queries(db):
+    """Context manager factory collecting SQL statements run by the test session"""
+    @contextmanager
+    def _count_queries():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        # Start the session transaction first so its SAVEPOINT isn't counted
+        connection = db.connection()
+        event.listen(connection, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+    return _count_queries
+
+@pytest.fixture(scope="session")
+def session_client() -> Generator[TestClient, None, None]:
+    """Single TestClient shared by all tests so app startup runs only once"""
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def client(db, session_client) -> Generator[TestClient, None, None]:
     """Get test client with database dependency override"""
     def override_get_db_for_test():
         try:
@@ -104,86 +236,68 @@ def client(db) -> Generator[TestClient, None, None]:
             pass  # Let the db fixture handle cleanup
 
     app.dependency_overrides[get_db] = override_get_db_for_test
-    yield TestClient(app)
+    yield session_client
     app.dependency_overrides.clear()  # Clean up the override after the test
 
-@pytest.fixture
-def test_user(db) -> Dict:
-    """Create a test user and return user data with tokens"""
-    password = "testpassword123"
-    user_data = {
-        "email": fake.email(),
-        "display_name": fake.name(),
-        "password": password,
-        "timezone": "UTC",
-        "locale": "en-US",
-        "daily_word_goal": 750,
-    }
-    
+def seed_test_user(seed_db, password: str, daily_word_goal: int) -> Dict:
+    """Commit a test user once and return its credentials (without the ORM object)"""
     db_user = User(
-        email=user_data["email"],
-        display_name=user_data["display_name"],
+        email=fake.email(),
+        display_name=fake.name(),
         hashed_password=get_password_hash(password),
-        timezone=user_data["timezone"],
-        locale=user_data["locale"],
-        daily_word_goal=user_data["daily_word_goal"],
+        timezone="UTC",
+        locale="en-US",
+        daily_word_goal=daily_word_goal,
         created_at=datetime.utcnow(),
         updated_at=datetime.utcnow()
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    # Create access token
+    seed_db.add(db_user)
+    # Read the generated id before commit expires db_user; reading it after
+    # would reload the row and leave seed_db idle in a transaction
+    seed_db.flush()
+    user_id, email = db_user.id, db_user.email
+    seed_db.commit()
+
     access_token = create_access_token(
-        data={"sub": str(db_user.id), "email": db_user.email}
+        data={"sub": str(user_id), "email": email},
+        expires_delta=TEST_TOKEN_EXPIRES
     )
-    
+
     return {
-        "user": db_user,
+        "user_id": user_id,
         "access_token": access_token,
         "token_type": "bearer",
         "password": password,
         "headers": {"Authorization": f"Bearer {access_token}"}
     }
 
+
+def load_test_user(db, seeded: Dict) -> Dict:
+    """Attach the seeded user to the current test's session"""
+    data = {key: value for key, value in seeded.items() if key != "user_id"}
+    data["user"] = db.get(User, seeded["user_id"])
+    return data
+
+
+@pytest.fixture(scope="session")
+def seeded_test_user(seed_db) -> Dict:
+    """Test user committed once per session; per-test changes are rolled back"""
+    return seed_test_user(seed_db, "testpassword123", daily_word_goal=750)
+
+
+@pytest.fixture(scope="session")
+def seeded_test_user2(seed_db) -> Dict:
+    """Second seeded test user for testing user isolation"""
+    return seed_test_user(seed_db, "testpassword456", daily_word_goal=500)
+
+
 @pytest.fixture
-def test_user2(db) -> Dict:
-    """Create a second test user for testing user isolation"""
-    password = "testpassword456"
-    user_data = {
-        "email": fake.email(),
-        "display_name": fake.name(),
-        "password": password,
-        "timezone": "UTC",
-        "locale": "en-US",
-        "daily_word_goal": 500,
-    }
-    
-    db_user = User(
-        email=user_data["email"],
-        display_name=user_data["display_name"],
-        hashed_password=get_password_hash(password),
-        timezone=user_data["timezone"],
-        locale=user_data["locale"],
-        daily_word_goal=user_data["daily_word_goal"],
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    access_token = create_access_token(
-        data={"sub": str(db_user.id), "email": db_user.email}
-    )
-    
-    return {
-        "user": db_user,
-        "access_token": access_token,
-        "token_type": "bearer",
-        "password": password,
-        "headers": {"Authorization": f"Bearer {access_token}"}
-    } 
+def test_user(db, seeded_test_user) -> Dict:
+    """Get the test user and its tokens"""
+    return load_test_user(db, seeded_test_user)
 
- 
+
+@pytest.fixture
+def test_user2(db, seeded_test_user2) -> Dict:
+    """Get a second test user for testing user isolation"""
+    return load_test_user(db, seeded_test_user2)
@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 import pytest
 from fastapi import status
+from sqlalchemy import insert
 
 def test_cleanup_stale_tags(client, test_user, db):
     """Test cleaning up stale tags (tags must have user_id now)"""
@@ -17,14 +18,11 @@ def test_cleanup_stale_tags(client, test_user, db):
         {"name": "fresh_tag_2", "last_used_at": datetime.utcnow()}
     ]
 
-    for data in tags_data:
-        tag = Tag(
-            user_id=test_user["user"].id,
-            name=data["name"],
-            last_used_at=data["last_used_at"]
-        )
-        db.add(tag)
-
+    # One multi-row INSERT instead of a flush per Tag object
+    db.execute(
+        insert(Tag),
+        [{"user_id": test_user["user"].id, **data} for data in tags_data]
+    )
     db.commit()
 
     # Get all tags to verify setup
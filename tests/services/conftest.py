@@ -0,0 +1,113 @@
+import base64
+import os
+
+import pytest
+import tenseal as ts
+
+from app.services.he_service import HEService
+
+# HE_TEST_LIGHT=1 swaps in smaller (still 128-bit secure) CKKS parameters for
+# quick local runs. Tests only add ciphertexts and scale by a plaintext once,
+# so a single rescale level is enough. Within 4096's 109-bit budget, the
+# 41-bit first prime leaves 11 bits over the 30-bit scale (values up to
+# +/-1024 after the rescale) and the 38-bit special prime keeps slot rotations
+# accurate; a smaller scale misses the 0.01 tolerances. Without the flag,
+# tests use the production parameters.
+HE_TEST_LIGHT = os.environ.get("HE_TEST_LIGHT") == "1"
+LIGHT_POLY_MODULUS_DEGREE = 4096
+LIGHT_COEFF_MOD_BIT_SIZES = [41, 30, 38]
+LIGHT_SCALE = 2 ** 30
+
+
+def _he_params():
+    """(poly_modulus_degree, coeff_mod_bit_sizes, scale) used by the test contexts"""
+    if HE_TEST_LIGHT:
+        return LIGHT_POLY_MODULUS_DEGREE, LIGHT_COEFF_MOD_BIT_SIZES, LIGHT_SCALE
+    return HEService.POLY_MODULUS_DEGREE, HEService.COEFF_MOD_BIT_SIZES, HEService.SCALE
+
+
+def _create_test_context(generate_galois_keys: bool = True) -> ts.Context:
+    """Create a context with the production or light test parameters"""
+    if not HE_TEST_LIGHT:
+        return HEService.create_context(generate_galois_keys=generate_galois_keys)
+
+    context = ts.context(
+        ts.SCHEME_TYPE.CKKS,
+        poly_modulus_degree=LIGHT_POLY_MODULUS_DEGREE,
+        coeff_mod_bit_sizes=LIGHT_COEFF_MOD_BIT_SIZES
+    )
+    context.global_scale = LIGHT_SCALE
+    if generate_galois_keys:
+        context.generate_galois_keys()
+    context.generate_relin_keys()
+    return context
+
+
+def _he_cache_key() -> str:
+    """pytest cache key, invalidated whenever the CKKS parameters change"""
+    poly_modulus_degree, coeff_mod_bit_sizes, scale = _he_params()
+    coeff_sizes = "-".join(str(size) for size in coeff_mod_bit_sizes)
+    return f"he/context/{poly_modulus_degree}/{coeff_sizes}/{scale}"
+
+
+@pytest.fixture(scope="session")
+def he_context(request):
+    """CKKS context with secret key, generated once and reused across runs
+
+    The serialized context is kept in the pytest cache, so only the first
+    run (or `pytest --cache-clear`) pays for keygen. The Galois keys (the
+    costliest part of keygen) are skipped; tests that rotate ciphertexts,
+    such as the slot sums, use he_context_galois instead.
+    """
+    # None under `-p no:cacheprovider`; fall back to generating every run
+    cache = getattr(request.config, "cache", None)
+    cache_key = _he_cache_key()
+    cached = cache.get(cache_key, None) if cache is not None else None
+    if cached is not None:
+        return HEService.deserialize_context(cached)
+
+    context = _create_test_context(generate_galois_keys=False)
+    if cache is not None:
+        # HEService.serialize_context drops the secret key, which tests need
+        serialized = context.serialize(save_secret_key=True)
+        cache.set(cache_key, base64.b64encode(serialized).decode('utf-8'))
+    return context
+
+
+@pytest.fixture(scope="session")
+def he_context_galois():
+    """CKKS context with Galois keys, for tests that rotate ciphertexts
+
+    Deliberately not kept in the pytest cache: deserializing a context with
+    Galois keys takes about as long as generating them.
+    """
+    return _create_test_context()
+
+
+@pytest.fixture(scope="session")
+def he_public_serialized(he_context):
+    """Shared context serialized without its secret key, computed once"""
+    return he_context.serialize(save_secret_key=False)
+
+
+def _encrypt_values(values, context):
+    """Encrypt each value separately, returning (values, ciphertexts)"""
+    return values, [HEService.encrypt_metric(v, context) for v in values]
+
+
+@pytest.fixture(scope="session")
+def enc_two_values(he_context):
+    """Two encrypted values shared by the aggregation tests"""
+    return _encrypt_values([10.5, 20.3], he_context)
+
+
+@pytest.fixture(scope="session")
+def enc_five_values(he_context):
+    """Five encrypted values shared by the aggregation tests"""
+    return _encrypt_values([100.0, 200.0, 300.0, 400.0, 500.0], he_context)
+
+
+@pytest.fixture(scope="session")
+def enc_hundred_ones(he_context):
+    """One hundred encrypted ones for precision tests"""
+    return _encrypt_values([1.0] * 100, he_context)
@@ -4,13 +4,17 @@ Tests for Homomorphic Encryption Service
 Tests CKKS encryption, aggregation, and serialization.
 """
 
+import os
+
 import pytest
 import tenseal as ts
 from app.services.he_service import (
     HEService,
     create_client_context,
     encrypt_user_metrics,
-    decrypt_user_metrics
+    decrypt_user_metrics,
+    encrypt_user_metrics_packed,
+    decrypt_user_metrics_packed
 )
 
 
@@ -24,20 +28,20 @@ class TestHEServiceContextCreation:
         assert context is not None
         assert context.is_private() is True  # Has secret key
 
-    def test_context_parameters(self):
+    @pytest.mark.skipif(
+        os.environ.get("HE_TEST_LIGHT") == "1",
+        reason="shared context uses light test parameters"
+    )
+    def test_context_parameters(self, he_context):
         """Test context has correct parameters"""
-        context = HEService.create_context()
-
         # Check poly modulus degree
         # Note: TenSEAL doesn't expose poly_modulus_degree directly,
         # but we can verify context was created successfully
-        assert context.global_scale == HEService.SCALE
+        assert he_context.global_scale == HEService.SCALE
 
-    def test_serialize_deserialize_context(self):
+    def test_serialize_deserialize_context(self, he_context):
         """Test context serialization roundtrip"""
-        original_context = HEService.create_context()
-
-        serialized = HEService.serialize_context(original_context)
+        serialized = HEService.serialize_context(he_context)
         assert isinstance(serialized, str)
         assert len(serialized) > 0
 
@@ -76,168 +80,136 @@ class TestHEServiceContextCreation:
 class TestHEServiceEncryption:
     """Test encryption and decryption"""
 
-    def test_encrypt_decrypt_single_value(self):
+    @pytest.mark.parametrize("original_value,tolerance", [
+        (42.5, 0.01),
+        (0.0, 0.01),
+        (-15.7, 0.01),
+        (999999.99, 1.0),  # Allow larger error for large values
+        (0.0001, 0.0001),
+    ], ids=["single", "zero", "negative", "large", "very_small"])
+    def test_encrypt_decrypt_roundtrip(self, he_context, original_value, tolerance):
         """Test encrypting and decrypting a single value"""
-        context = HEService.create_context()
-        original_value = 42.5
-
-        encrypted = HEService.encrypt_metric(original_value, context)
+        encrypted = HEService.encrypt_metric(original_value, he_context)
         assert isinstance(encrypted, str)
 
-        decrypted = HEService.decrypt_result(encrypted, context)
+        decrypted = HEService.decrypt_result(encrypted, he_context)
         assert isinstance(decrypted, float)
-        assert abs(decrypted - original_value) < 0.01  # Allow small precision error
+        assert abs(decrypted - original_value) < tolerance
 
-    def test_encrypt_decrypt_batch(self):
+    def test_encrypt_decrypt_batch(self, he_context):
         """Test encrypting and decrypting multiple values"""
-        context = HEService.create_context()
         original_values = [10.5, 20.3, 30.7, 40.2]
 
-        encrypted = HEService.encrypt_metrics_batch(original_values, context)
+        encrypted = HEService.encrypt_metrics_batch(original_values, he_context)
         assert isinstance(encrypted, str)
 
-        decrypted = HEService.decrypt_batch(encrypted, context)
+        decrypted = HEService.decrypt_batch(encrypted, he_context)
         assert isinstance(decrypted, list)
         assert len(decrypted) == len(original_values)
 
         for original, decrypted_val in zip(original_values, decrypted):
             assert abs(decrypted_val - original) < 0.01
 
-    def test_encrypt_zero(self):
-        """Test encrypting zero value"""
-        context = HEService.create_context()
-
-        encrypted = HEService.encrypt_metric(0.0, context)
-        decrypted = HEService.decrypt_result(encrypted, context)
-
-        assert abs(decrypted - 0.0) < 0.01
-
-    def test_encrypt_negative(self):
-        """Test encrypting negative values"""
-        context = HEService.create_context()
-        original_value = -15.7
-
-        encrypted = HEService.encrypt_metric(original_value, context)
-        decrypted = HEService.decrypt_result(encrypted, context)
-
-        assert abs(decrypted - original_value) < 0.01
-
-    def test_encrypt_large_value(self):
-        """Test encrypting large values"""
-        context = HEService.create_context()
-        original_value = 999999.99
-
-        encrypted = HEService.encrypt_metric(original_value, context)
-        decrypted = HEService.decrypt_result(encrypted, context)
-
-        assert abs(decrypted - original_value) < 1.0  # Allow larger error for large values
-
 
 class TestHEServiceAggregation:
     """Test homomorphic aggregation operations"""
 
-    def test_aggregate_sum_two_values(self):
+    def test_aggregate_sum_two_values(self, he_context, enc_two_values):
         """Test summing two encrypted values"""
-        context = HEService.create_context()
-        value1, value2 = 10.5, 20.3
+        values, encrypted_values = enc_two_values
 
-        encrypted1 = HEService.encrypt_metric(value1, context)
-        encrypted2 = HEService.encrypt_metric(value2, context)
+        encrypted_sum = HEService.aggregate_sum(encrypted_values, he_context)
 
-        encrypted_sum = HEService.aggregate_sum([encrypted1, encrypted2], context)
+        decrypted_sum = HEService.decrypt_result(encrypted_sum, he_context)
 
-        decrypted_sum = HEService.decrypt_result(encrypted_sum, context)
-
-        expected_sum = value1 + value2
+        expected_sum = sum(values)
         assert abs(decrypted_sum - expected_sum) < 0.01
 
-    def test_aggregate_sum_multiple_values(self):
-        """Test summing multiple encrypted values"""
-        context = HEService.create_context()
+    def test_aggregate_sum_multiple_values(self, he_context_galois):
+        """Test summing multiple values packed into one ciphertext"""
         values = [10.0, 20.0, 30.0, 40.0, 50.0]
 
-        encrypted_values = [HEService.encrypt_metric(v, context) for v in values]
+        encrypted = HEService.encrypt_metrics_batch(values, he_context_galois)
 
-        encrypted_sum = HEService.aggregate_sum(encrypted_values, context)
+        encrypted_sum = HEService.aggregate_sum_slots(encrypted, he_context_galois)
 
-        decrypted_sum = HEService.decrypt_result(encrypted_sum, context)
+        decrypted_sum = HEService.decrypt_result(encrypted_sum, he_context_galois)
 
         expected_sum = sum(values)
         assert abs(decrypted_sum - expected_sum) < 0.1
 
-    def test_aggregate_average_two_values(self):
+    def test_aggregate_average_two_values(self, he_context, enc_two_values):
         """Test averaging two encrypted values"""
-        context = HEService.create_context()
-        value1, value2 = 10.0, 20.0
-
-        encrypted1 = HEService.encrypt_metric(value1, context)
-        encrypted2 = HEService.encrypt_metric(value2, context)
+        values, encrypted_values = enc_two_values
 
-        encrypted_avg = HEService.aggregate_average([encrypted1, encrypted2], context)
+        encrypted_avg = HEService.aggregate_average(encrypted_values, he_context)
 
-        decrypted_avg = HEService.decrypt_result(encrypted_avg, context)
+        decrypted_avg = HEService.decrypt_result(encrypted_avg, he_context)
 
-        expected_avg = (value1 + value2) / 2
+        expected_avg = sum(values) / 2
         assert abs(decrypted_avg - expected_avg) < 0.01
 
-    def test_aggregate_average_multiple_values(self):
+    def test_aggregate_average_multiple_values(self, he_context, enc_five_values):
         """Test averaging multiple encrypted values"""
-        context = HEService.create_context()
-        values = [100.0, 200.0, 300.0, 400.0, 500.0]
-
-        encrypted_values = [HEService.encrypt_metric(v, context) for v in values]
+        values, encrypted_values = enc_five_values
 
-        encrypted_avg = HEService.aggregate_average(encrypted_values, context)
+        encrypted_avg = HEService.aggregate_average(encrypted_values, he_context)
 
-        decrypted_avg = HEService.decrypt_result(encrypted_avg, context)
+        decrypted_avg = HEService.decrypt_result(encrypted_avg, he_context)
 
         expected_avg = sum(values) / len(values)
         assert abs(decrypted_avg - expected_avg) < 1.0
 
-    def test_aggregate_sum_with_negatives(self):
+    def test_aggregate_sum_with_negatives(self, he_context_galois):
         """Test sum with mixed positive/negative values"""
-        context = HEService.create_context()
         values = [10.0, -5.0, 20.0, -10.0, 15.0]
 
-        encrypted_values = [HEService.encrypt_metric(v, context) for v in values]
-        encrypted_sum = HEService.aggregate_sum(encrypted_values, context)
-        decrypted_sum = HEService.decrypt_result(encrypted_sum, context)
+        encrypted = HEService.encrypt_metrics_batch(values, he_context_galois)
+        encrypted_sum = HEService.aggregate_sum_slots(encrypted, he_context_galois)
+        decrypted_sum = HEService.decrypt_result(encrypted_sum, he_context_galois)
 
         expected_sum = sum(values)
         assert abs(decrypted_sum - expected_sum) < 0.1
 
-    def test_aggregate_empty_list_raises_error(self):
-        """Test that aggregating empty list raises error"""
-        context = HEService.create_context()
+    def test_aggregate_sum_separate_ciphertexts_with_negatives(self, he_context):
+        """Test summing one ciphertext per value, as the aggregate endpoint does"""
+        values = [10.0, -5.0, 20.0, -10.0, 15.0]
+
+        encrypted_values = [HEService.encrypt_metric(v, he_context) for v in values]
+        encrypted_sum = HEService.aggregate_sum(encrypted_values, he_context)
+        decrypted_sum = HEService.decrypt_result(encrypted_sum, he_context)
+
+        expected_sum = sum(values)
+        assert abs(decrypted_sum - expected_sum) < 0.1
 
+    def test_aggregate_empty_list_raises_error(self, he_context):
+        """Test that aggregating empty list raises error"""
         with pytest.raises(ValueError, match="Cannot aggregate empty list"):
-            HEService.aggregate_sum([], context)
+            HEService.aggregate_sum([], he_context)
 
         with pytest.raises(ValueError, match="Cannot aggregate empty list"):
-            HEService.aggregate_average([], context)
+            HEService.aggregate_average([], he_context)
 
 
 class TestHEServiceUserMetrics:
     """Test convenience functions for user metrics"""
 
-    def test_encrypt_user_metrics(self):
+    def test_encrypt_user_metrics(self, he_context):
         """Test encrypting dictionary of user metrics"""
-        context = HEService.create_context()
         metrics = {
             "word_count": 500.0,
             "sentiment": 0.75,
             "duration": 1200.0
         }
 
-        encrypted = encrypt_user_metrics(metrics, context)
+        encrypted = encrypt_user_metrics(metrics, he_context)
 
         assert isinstance(encrypted, dict)
         assert len(encrypted) == 3
         assert all(isinstance(v, str) for v in encrypted.values())
 
-    def test_decrypt_user_metrics(self):
+    def test_decrypt_user_metrics(self, he_context):
         """Test decrypting dictionary of user metrics"""
-        context = HEService.create_context()
         metrics = {
             "word_count": 500.0,
             "sentiment": 0.75,
@@ -245,8 +217,8 @@ class TestHEServiceUserMetrics:
         }
 
         # Encrypt then decrypt
-        encrypted = encrypt_user_metrics(metrics, context)
-        decrypted = decrypt_user_metrics(encrypted, context)
+        encrypted = encrypt_user_metrics(metrics, he_context)
+        decrypted = decrypt_user_metrics(encrypted, he_context)
 
         assert isinstance(decrypted, dict)
         assert len(decrypted) == 3
@@ -254,9 +226,42 @@ class TestHEServiceUserMetrics:
         for key, original_value in metrics.items():
             assert abs(decrypted[key] - original_value) < 0.01
 
-    def test_encrypt_decrypt_metrics_roundtrip(self):
+    def test_encrypt_user_metrics_packed(self, he_context):
+        """Test packing a dictionary of user metrics into one ciphertext"""
+        metrics = {
+            "word_count": 500.0,
+            "sentiment": 0.75,
+            "duration": 1200.0
+        }
+
+        metric_types, encrypted = encrypt_user_metrics_packed(metrics, he_context)
+
+        assert metric_types == list(metrics.keys())
+        assert isinstance(encrypted, str)
+
+        decrypted = HEService.decrypt_batch(encrypted, he_context)
+        assert len(decrypted) == len(metrics)
+
+        for key, value in zip(metric_types, decrypted):
+            assert abs(value - metrics[key]) < 0.01
+
+    def test_decrypt_user_metrics_packed(self, he_context):
+        """Test unpacking a packed ciphertext back into named metrics"""
+        metrics = {
+            "word_count": 500.0,
+            "sentiment": 0.75,
+            "duration": 1200.0
+        }
+
+        metric_types, encrypted = encrypt_user_metrics_packed(metrics, he_context)
+        decrypted = decrypt_user_metrics_packed(metric_types, encrypted, he_context)
+
+        assert decrypted.keys() == metrics.keys()
+        for key, original_value in metrics.items():
+            assert abs(decrypted[key] - original_value) < 0.01
+
+    def test_encrypt_decrypt_metrics_roundtrip(self, he_context):
         """Test full roundtrip of metrics encryption"""
-        context = HEService.create_context()
         original_metrics = {
             "word_count": 750.0,
             "sentiment_score": 0.82,
@@ -265,8 +270,8 @@ class TestHEServiceUserMetrics:
             "vocabulary_diversity": 0.71
         }
 
-        encrypted = encrypt_user_metrics(original_metrics, context)
-        decrypted = decrypt_user_metrics(encrypted, context)
+        encrypted = encrypt_user_metrics(original_metrics, he_context)
+        decrypted = decrypt_user_metrics(encrypted, he_context)
 
         # Verify all metrics preserved
         for key, original_value in original_metrics.items():
@@ -277,14 +282,13 @@ class TestHEServiceUserMetrics:
 class TestHEServiceSerialization:
     """Test serialization with encrypted values"""
 
-    def test_deserialize_encrypted_value(self):
+    def test_deserialize_encrypted_value(self, he_context):
         """Test deserializing encrypted value"""
-        context = HEService.create_context()
         value = 42.0
 
-        encrypted = HEService.encrypt_metric(value, context)
+        encrypted = HEService.encrypt_metric(value, he_context)
 
-        encrypted_vec = HEService.deserialize_encrypted(encrypted, context)
+        encrypted_vec = HEService.deserialize_encrypted(encrypted, he_context)
 
         assert encrypted_vec is not None
         assert isinstance(encrypted_vec, ts.CKKSVector)
@@ -292,17 +296,10 @@ class TestHEServiceSerialization:
         decrypted_list = encrypted_vec.decrypt()
         assert abs(decrypted_list[0] - value) < 0.01
 
-    def test_serialize_deserialize_public_context(self):
+    def test_serialize_deserialize_public_context(self, he_context, he_public_serialized):
         """Test public context can encrypt but not decrypt"""
-        # Create context with secret key
-        private_context = HEService.create_context()
-
-        # Serialize without secret key
-        private_serialized = private_context.serialize()
-        public_serialized = private_context.serialize(save_secret_key=False)
-
-        # Deserialize public context
-        public_context = ts.context_from(public_serialized)
+        # Deserialize public context (shared context serialized without secret key)
+        public_context = ts.context_from(he_public_serialized)
 
         # Public context should not be private
         assert public_context.is_private() is False
@@ -312,62 +309,58 @@ class TestHEServiceSerialization:
         assert isinstance(encrypted, str)
 
         # Decrypt with private context should work
-        decrypted = HEService.decrypt_result(encrypted, private_context)
+        decrypted = HEService.decrypt_result(encrypted, he_context)
         assert abs(decrypted - 42.0) < 0.01
 
 
 class TestHEServiceEdgeCases:
     """Test edge cases and error handling"""
 
-    def test_very_small_values(self):
-        """Test encrypting very small values"""
-        context = HEService.create_context()
-        value = 0.0001
-
-        encrypted = HEService.encrypt_metric(value, context)
-        decrypted = HEService.decrypt_result(encrypted, context)
-
-        # Allow larger relative error for very small values
-        assert abs((decrypted - value) / value) < 0.1 or abs(decrypted - value) < 0.0001
-
-    def test_single_value_aggregation(self):
+    def test_single_value_aggregation(self, he_context):
         """Test aggregating a single value"""
-        context = HEService.create_context()
         value = 100.0
 
-        encrypted = HEService.encrypt_metric(value, context)
+        encrypted = HEService.encrypt_metric(value, he_context)
 
         # Sum of single value
-        encrypted_sum = HEService.aggregate_sum([encrypted], context)
-        decrypted_sum = HEService.decrypt_result(encrypted_sum, context)
+        encrypted_sum = HEService.aggregate_sum([encrypted], he_context)
+        decrypted_sum = HEService.decrypt_result(encrypted_sum, he_context)
         assert abs(decrypted_sum - value) < 0.01
 
         # Average of single value
-        encrypted_avg = HEService.aggregate_average([encrypted], context)
-        decrypted_avg = HEService.decrypt_result(encrypted_avg, context)
+        encrypted_avg = HEService.aggregate_average([encrypted], he_context)
+        decrypted_avg = HEService.decrypt_result(encrypted_avg, he_context)
         assert abs(decrypted_avg - value) < 0.01
 
-    def test_precision_with_many_operations(self):
-        """Test precision degradation with many operations"""
-        context = HEService.create_context()
-
-        # Create 100 small values
+    def test_precision_with_batched_sum(self, he_context_galois):
+        """Test sum precision over 100 values packed into one ciphertext"""
         values = [1.0] * 100
 
-        # Encrypt all
-        encrypted_values = [HEService.encrypt_metric(v, context) for v in values]
+        encrypted = HEService.encrypt_metrics_batch(values, he_context_galois)
+
+        encrypted_sum = HEService.aggregate_sum_slots(encrypted, he_context_galois)
+        decrypted_sum = HEService.decrypt_result(encrypted_sum, he_context_galois)
+
+        expected_sum = sum(values)
+        assert abs(decrypted_sum - expected_sum) < 1.0
+
+    @pytest.mark.slow
+    def test_precision_with_many_operations(self, he_context, enc_hundred_ones):
+        """Test precision degradation with many operations"""
+        # 100 small values, encrypted once per session
+        values, encrypted_values = enc_hundred_ones
 
         # Sum (many additions)
-        encrypted_sum = HEService.aggregate_sum(encrypted_values, context)
-        decrypted_sum = HEService.decrypt_result(encrypted_sum, context)
+        encrypted_sum = HEService.aggregate_sum(encrypted_values, he_context)
+        decrypted_sum = HEService.decrypt_result(encrypted_sum, he_context)
 
         expected_sum = sum(values)
         # Allow larger error for many operations
         assert abs(decrypted_sum - expected_sum) < 1.0
 
         # Average
-        encrypted_avg = HEService.aggregate_average(encrypted_values, context)
-        decrypted_avg = HEService.decrypt_result(encrypted_avg, context)
+        encrypted_avg = HEService.aggregate_average(encrypted_values, he_context)
+        decrypted_avg = HEService.decrypt_result(encrypted_avg, he_context)
 
         expected_avg = expected_sum / len(values)
         assert abs(decrypted_avg - expected_avg) < 0.1
@@ -2,32 +2,61 @@ import pytest
 from datetime import datetime, timedelta
 from app.services.sync_service import SyncService
 from app.models.models import EncryptedBackup, SyncConflict, User
+from sqlalchemy import insert
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.orm import Session
 import uuid
 import base64
 
+# Fixed reference time: relative offsets stay deterministic and no test
+# needs to read the clock
+NOW = datetime(2024, 1, 1)
 
-@pytest.fixture
+
+def _backup_rows(user_id, count):
+    """Rows for a bulk insert(EncryptedBackup) of `count` minimal backups"""
+    return [
+        {
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'encrypted_content': f"content{i}".encode(),
+            'content_iv': f'iv{i}',
+            'created_at': NOW,
+            'updated_at': NOW,
+            'device_id': 'device-1'
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture(scope="session")
 def sync_service():
+    """SyncService is stateless (static methods only), so share one instance"""
     return SyncService()
 
 
-@pytest.fixture
-def sample_user(db: Session):
-    """Create a sample user for testing"""
+@pytest.fixture(scope="session")
+def sample_user_id(seed_db: Session):
+    """Insert the sample user once per session, outside the per-test transactions"""
+    user_id = uuid.uuid4()
     user = User(
-        id=uuid.uuid4(),
+        id=user_id,
         email=f"test_{uuid.uuid4().hex[:8]}@example.com",
         hashed_password="hashed_password",
         display_name="Test User",
         privacy_tier='full_sync',
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
+        created_at=NOW,
+        updated_at=NOW
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    seed_db.add(user)
+    seed_db.commit()
+    return user_id
+
+
+@pytest.fixture
+def sample_user(db: Session, sample_user_id):
+    """Load the pre-seeded sample user into the current test session"""
+    return db.get(User, sample_user_id)
 
 
 @pytest.fixture
@@ -40,8 +69,8 @@ def sample_backup_data(sample_user):
         'content_tag': 'test_tag_456',
         'encrypted_embedding': base64.b64encode(b"test encrypted embedding").decode(),
         'embedding_iv': 'embedding_iv_789',
-        'created_at': datetime.utcnow(),
-        'updated_at': datetime.utcnow(),
+        'created_at': NOW,
+        'updated_at': NOW,
         'device_id': 'device-1'
     }
 
@@ -57,13 +86,13 @@ def existing_backup(db: Session, sample_user):
         content_tag="existing_tag",
         encrypted_embedding=b"existing encrypted embedding",
         embedding_iv="existing_embedding_iv",
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow(),
+        created_at=NOW,
+        updated_at=NOW,
         device_id="device-1"
     )
     db.add(backup)
-    db.commit()
-    db.refresh(backup)
+    # Flush only: one INSERT, no refresh SELECT; rolled back with the test
+    db.flush()
     return backup
 
 
@@ -94,7 +123,7 @@ class TestSyncServiceBackupOperations:
             'encrypted_embedding': base64.b64encode(b"updated embedding").decode(),
             'embedding_iv': 'updated_embedding_iv',
             'created_at': existing_backup.created_at,
-            'updated_at': datetime.utcnow(),
+            'updated_at': NOW,
             'device_id': existing_backup.device_id
         }
 
@@ -120,16 +149,108 @@ class TestSyncServiceBackupOperations:
         assert backup.encrypted_embedding is not None
         assert backup.embedding_iv is not None
 
+    def test_store_encrypted_backups_batch(self, sync_service, db: Session, sample_user, existing_backup):
+        """Test storing new backups and updating an existing one in one batch"""
+        new_data = [
+            {
+                'id': str(uuid.uuid4()),
+                'encrypted_content': base64.b64encode(f"content{i}".encode()).decode(),
+                'content_iv': f'iv{i}',
+                'created_at': NOW,
+                'updated_at': NOW,
+                'device_id': 'device-1'
+            }
+            for i in range(3)
+        ]
+        update_data = {
+            'id': existing_backup.id,
+            'encrypted_content': base64.b64encode(b"updated content").decode(),
+            'content_iv': 'updated_iv',
+            'created_at': existing_backup.created_at,
+            'updated_at': NOW,
+            'device_id': existing_backup.device_id
+        }
+
+        stored, conflicts = sync_service.store_encrypted_backups_batch(
+            db=db,
+            user_id=sample_user.id,
+            backups_data=new_data + [update_data]
+        )
+
+        assert conflicts == []
+        assert [backup.id for backup in stored] == [data['id'] for data in new_data] + [existing_backup.id]
+        assert stored[-1].content_iv == 'updated_iv'
+
+    def test_store_encrypted_backups_batch_conflict(self, sync_service, db: Session, sample_user, existing_backup):
+        """Test that a conflicting backup in a batch becomes a conflict record"""
+        conflicting_data = {
+            'id': existing_backup.id,
+            'encrypted_content': base64.b64encode(b"local content").decode(),
+            'content_iv': 'local_iv',
+            'created_at': existing_backup.created_at,
+            'updated_at': NOW + timedelta(minutes=5),
+            'device_id': 'device-2'
+        }
+
+        stored, conflicts = sync_service.store_encrypted_backups_batch(
+            db=db,
+            user_id=sample_user.id,
+            backups_data=[conflicting_data]
+        )
+
+        assert stored == []
+        assert len(conflicts) == 1
+        assert conflicts[0].log_id == existing_backup.id
+        assert conflicts[0].local_device_id == 'device-2'
+
+    def test_store_encrypted_backups_batch_reloads_in_bulk(self, sync_service, db: Session, sample_user, count_queries):
+        """Test a batch with conflicts leaves no expired rows to refresh one by one"""
+        user_id = sample_user.id
+        rows = _backup_rows(user_id, 3)
+        db.execute(insert(EncryptedBackup), rows)
+        conflicting_data = [
+            {
+                'id': row['id'],
+                'encrypted_content': base64.b64encode(b"local content").decode(),
+                'content_iv': 'local_iv',
+                'created_at': NOW,
+                'updated_at': NOW + timedelta(minutes=5),
+                'device_id': 'device-2'
+            }
+            for row in rows
+        ]
+        new_data = {
+            'id': str(uuid.uuid4()),
+            'encrypted_content': base64.b64encode(b"new content").decode(),
+            'content_iv': 'new_iv',
+            'created_at': NOW,
+            'updated_at': NOW,
+            'device_id': 'device-1'
+        }
+
+        stored, conflicts = sync_service.store_encrypted_backups_batch(
+            db=db,
+            user_id=user_id,
+            backups_data=conflicting_data + [new_data]
+        )
+
+        with count_queries() as queries:
+            [(conflict.id, conflict.log_id) for conflict in conflicts]
+            [(backup.id, backup.device_id) for backup in stored]
+
+        assert len(conflicts) == 3
+        assert len(stored) == 1
+        assert queries == []
+
     def test_fetch_backups_since_timestamp(self, sync_service, db: Session, sample_user):
         """Test fetching backups since a specific timestamp"""
-        now = datetime.utcnow()
 
         backup1_data = {
             'id': str(uuid.uuid4()),
             'encrypted_content': base64.b64encode(b"content1").decode(),
             'content_iv': 'iv1',
-            'created_at': now - timedelta(days=5),
-            'updated_at': now - timedelta(days=5),
+            'created_at': NOW - timedelta(days=5),
+            'updated_at': NOW - timedelta(days=5),
             'device_id': 'device-1'
         }
 
@@ -137,15 +258,15 @@ class TestSyncServiceBackupOperations:
             'id': str(uuid.uuid4()),
             'encrypted_content': base64.b64encode(b"content2").decode(),
             'content_iv': 'iv2',
-            'created_at': now - timedelta(days=2),
-            'updated_at': now - timedelta(days=2),
+            'created_at': NOW - timedelta(days=2),
+            'updated_at': NOW - timedelta(days=2),
             'device_id': 'device-1'
         }
 
         sync_service.store_encrypted_backup(db, sample_user.id, backup1_data)
         sync_service.store_encrypted_backup(db, sample_user.id, backup2_data)
 
-        since = now - timedelta(days=3)
+        since = NOW - timedelta(days=3)
         backups = sync_service.fetch_backups_since(
             db=db,
             user_id=sample_user.id,
@@ -161,8 +282,8 @@ class TestSyncServiceBackupOperations:
             'id': str(uuid.uuid4()),
             'encrypted_content': base64.b64encode(b"content1").decode(),
             'content_iv': 'iv1',
-            'created_at': datetime.utcnow(),
-            'updated_at': datetime.utcnow(),
+            'created_at': NOW,
+            'updated_at': NOW,
             'device_id': 'device-1'
         }
 
@@ -170,8 +291,8 @@ class TestSyncServiceBackupOperations:
             'id': str(uuid.uuid4()),
             'encrypted_content': base64.b64encode(b"content2").decode(),
             'content_iv': 'iv2',
-            'created_at': datetime.utcnow(),
-            'updated_at': datetime.utcnow(),
+            'created_at': NOW,
+            'updated_at': NOW,
             'device_id': 'device-2'
         }
 
@@ -189,16 +310,8 @@ class TestSyncServiceBackupOperations:
 
     def test_fetch_backups_pagination_limit(self, sync_service, db: Session, sample_user):
         """Test pagination limit for fetching backups"""
-        for i in range(10):
-            backup_data = {
-                'id': str(uuid.uuid4()),
-                'encrypted_content': base64.b64encode(f"content{i}".encode()).decode(),
-                'content_iv': f'iv{i}',
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow(),
-                'device_id': 'device-1'
-            }
-            sync_service.store_encrypted_backup(db, sample_user.id, backup_data)
+        db.execute(insert(EncryptedBackup), _backup_rows(sample_user.id, 10))
+        db.commit()
 
         backups = sync_service.fetch_backups_since(
             db=db,
@@ -208,6 +321,31 @@ class TestSyncServiceBackupOperations:
 
         assert len(backups) == 5
 
+    def test_fetch_backups_disallows_lazy_loads(self, sync_service, db: Session, sample_user, existing_backup):
+        """Test fetched backups raise instead of lazily loading relationships"""
+        db.expunge_all()
+
+        backups = sync_service.fetch_backups_since(db=db, user_id=sample_user.id)
+
+        assert len(backups) == 1
+        with pytest.raises(InvalidRequestError):
+            backups[0].user
+
+    def test_fetch_backups_single_query(self, sync_service, db: Session, sample_user, count_queries):
+        """Test fetching backups costs one query regardless of row count"""
+        # Read before commit: commit expires sample_user, and reloading it
+        # inside the block would be counted
+        user_id = sample_user.id
+        db.execute(insert(EncryptedBackup), _backup_rows(user_id, 5))
+        db.commit()
+
+        with count_queries() as queries:
+            backups = sync_service.fetch_backups_since(db=db, user_id=user_id)
+            [backup.device_id for backup in backups]
+
+        assert len(backups) == 5
+        assert len(queries) == 1
+
     def test_delete_backup_success(self, sync_service, db: Session, sample_user, existing_backup):
         """Test deleting an existing backup"""
         deleted = sync_service.delete_backup(
@@ -218,8 +356,7 @@ class TestSyncServiceBackupOperations:
 
         assert deleted is True
 
-        backup = db.query(EncryptedBackup).filter(EncryptedBackup.id == existing_backup.id).first()
-        assert backup is None
+        assert db.get(EncryptedBackup, existing_backup.id) is None
 
     def test_delete_backup_not_found(self, sync_service, db: Session, sample_user):
         """Test deleting a non-existent backup"""
@@ -233,16 +370,8 @@ class TestSyncServiceBackupOperations:
 
     def test_delete_all_backups_for_user(self, sync_service, db: Session, sample_user):
         """Test deleting all backups for a user (privacy tier downgrade)"""
-        for i in range(5):
-            backup_data = {
-                'id': str(uuid.uuid4()),
-                'encrypted_content': base64.b64encode(f"content{i}".encode()).decode(),
-                'content_iv': f'iv{i}',
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow(),
-                'device_id': 'device-1'
-            }
-            sync_service.store_encrypted_backup(db, sample_user.id, backup_data)
+        db.execute(insert(EncryptedBackup), _backup_rows(sample_user.id, 5))
+        db.commit()
 
         count = sync_service.delete_all_backups(db, sample_user.id)
 
@@ -255,47 +384,24 @@ class TestSyncServiceBackupOperations:
 class TestSyncServiceConflictDetection:
     """Test conflict detection logic"""
 
-    def test_detect_conflict_different_timestamps_different_devices(self, sync_service, existing_backup):
-        """Test conflict detection with different timestamps and devices"""
+    @pytest.mark.parametrize("device_id,offset_minutes,expected", [
+        ("device-2", 5, True),
+        ("device-1", 5, False),
+        ("device-2", 0, False),
+    ], ids=["different_timestamps_different_devices", "same_device", "same_timestamp"])
+    def test_detect_conflict(self, sync_service, existing_backup, device_id, offset_minutes, expected):
+        """Test conflict detection across device/timestamp combinations"""
         local_data = {
             'id': existing_backup.id,
             'encrypted_content': base64.b64encode(b"local content").decode(),
             'content_iv': 'local_iv',
-            'updated_at': datetime.utcnow() + timedelta(minutes=5),
-            'device_id': 'device-2'
-        }
-
-        conflict = sync_service.detect_conflict(local_data, existing_backup)
-
-        assert conflict is True
-
-    def test_no_conflict_same_device(self, sync_service, existing_backup):
-        """Test no conflict when update is from same device"""
-        local_data = {
-            'id': existing_backup.id,
-            'encrypted_content': base64.b64encode(b"updated content").decode(),
-            'content_iv': 'updated_iv',
-            'updated_at': datetime.utcnow() + timedelta(minutes=5),
-            'device_id': existing_backup.device_id
+            'updated_at': existing_backup.updated_at + timedelta(minutes=offset_minutes),
+            'device_id': device_id
         }
 
         conflict = sync_service.detect_conflict(local_data, existing_backup)
 
-        assert conflict is False
-
-    def test_no_conflict_same_timestamp(self, sync_service, existing_backup):
-        """Test no conflict when timestamps match"""
-        local_data = {
-            'id': existing_backup.id,
-            'encrypted_content': base64.b64encode(b"same content").decode(),
-            'content_iv': 'same_iv',
-            'updated_at': existing_backup.updated_at,
-            'device_id': 'device-2'
-        }
-
-        conflict = sync_service.detect_conflict(local_data, existing_backup)
-
-        assert conflict is False
+        assert conflict is expected
 
     def test_create_conflict_record(self, sync_service, db: Session, sample_user, existing_backup):
         """Test creating a conflict record"""
@@ -303,7 +409,7 @@ class TestSyncServiceConflictDetection:
             'id': existing_backup.id,
             'encrypted_content': base64.b64encode(b"local content").decode(),
             'content_iv': 'local_iv',
-            'updated_at': datetime.utcnow() + timedelta(minutes=5),
+            'updated_at': NOW + timedelta(minutes=5),
             'device_id': 'device-2'
         }
 
@@ -327,7 +433,7 @@ class TestSyncServiceConflictDetection:
             'id': existing_backup.id,
             'encrypted_content': base64.b64encode(b"local content").decode(),
             'content_iv': 'local_iv',
-            'updated_at': datetime.utcnow(),
+            'updated_at': NOW,
             'device_id': 'device-2'
         }
 
@@ -355,17 +461,16 @@ class TestSyncServiceConflictResolution:
             log_id=existing_backup.id,
             local_encrypted_content=b"local content",
             local_iv="local_iv",
-            local_updated_at=datetime.utcnow(),
+            local_updated_at=NOW,
             local_device_id="device-2",
             remote_encrypted_content=existing_backup.encrypted_content,
             remote_iv=existing_backup.content_iv,
             remote_updated_at=existing_backup.updated_at,
             remote_device_id=existing_backup.device_id,
-            detected_at=datetime.utcnow()
+            detected_at=NOW
         )
         db.add(conflict)
-        db.commit()
-        db.refresh(conflict)
+        db.flush()
         return conflict
 
     def test_resolve_conflict_choose_local(self, sync_service, db: Session, sample_user, existing_backup, sample_conflict):
@@ -385,7 +490,6 @@ class TestSyncServiceConflictResolution:
         assert backup.encrypted_content == sample_conflict.local_encrypted_content
         assert backup.content_iv == sample_conflict.local_iv
 
-        db.refresh(sample_conflict)
         assert sample_conflict.resolved is True
 
     def test_resolve_conflict_choose_remote(self, sync_service, db: Session, sample_user, existing_backup, sample_conflict):
@@ -404,7 +508,6 @@ class TestSyncServiceConflictResolution:
         assert backup is not None
         assert backup.encrypted_content == existing_backup.encrypted_content
 
-        db.refresh(sample_conflict)
         assert sample_conflict.resolved is True
 
     def test_resolve_conflict_with_merged_version(self, sync_service, db: Session, sample_user, existing_backup, sample_conflict):
@@ -428,7 +531,6 @@ class TestSyncServiceConflictResolution:
         assert b"merged content" == backup.encrypted_content
         assert backup.content_iv == 'merged_iv'
 
-        db.refresh(sample_conflict)
         assert sample_conflict.resolved is True
 
     def test_get_unresolved_conflicts(self, sync_service, db: Session, sample_user, sample_conflict):
@@ -455,7 +557,6 @@ class TestSyncServiceConflictResolution:
             resolution=resolution
         )
 
-        db.refresh(sample_conflict)
         assert sample_conflict.resolved is True
         assert sample_conflict.resolved_at is not None
 